@@ -1,8 +1,10 @@
 import os
+import threading
 import urllib.request
 from typing import Any, Dict
 
-from clarifai_grpc.channel.clarifai_channel import ClarifaiChannel
+import grpc
+from clarifai_grpc.channel import clarifai_channel
 from clarifai_grpc.grpc.api import resources_pb2, service_pb2_grpc
 
 DEFAULT_BASE = "https://api.clarifai.com"
@@ -13,11 +15,43 @@ DEFAULT_UI = "https://clarifai.com"
 base_https_cache = {}
 ui_https_cache = {}
 
+# Map from base domain to the V2Stub (and so the gRPC channel) used to reach it, so that every
+# client talking to the same base reuses one connection instead of doing a new TLS handshake.
+# This is filled in get_stub() if it's not in there already.
+base_stub_cache = {}
+_base_stub_cache_lock = threading.Lock()
+
+# Options for the channels to the API: those used by ClarifaiChannel, plus keepalive pings so
+# that a long-lived shared channel notices dropped connections instead of hanging on them.
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.service_config", clarifai_channel.grpc_json_config),
+    ("grpc.max_receive_message_length", clarifai_channel.MAX_MESSAGE_LENGTH),
+    ("grpc.max_send_message_length", clarifai_channel.MAX_MESSAGE_LENGTH),
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+def v2_stub_for_channel(channel: grpc.Channel) -> service_pb2_grpc.V2Stub:
+  """Create a V2Stub on a channel that was not made through ClarifaiChannel.
+
+  Compat shim: V2Stub.__init__ reads the function that wraps its response deserializers from
+  the clarifai_grpc module global clarifai_channel.wrap_response_deserializer, which is only set
+  as a side effect of the ClarifaiChannel.get_*_channel() methods. Set it to what
+  get_grpc_channel() uses before building the stub, so that responses are parsed from protobuf
+  bytes. This is the only place the global should be touched.
+  """
+  clarifai_channel.wrap_response_deserializer = clarifai_channel._response_deserializer_for_grpc
+  return service_pb2_grpc.V2Stub(channel)
+
 
 def clear_cache() -> None:
   """Clears the cache."""
   base_https_cache.clear()
   ui_https_cache.clear()
+  with _base_stub_cache_lock:
+    base_stub_cache.clear()
 
 
 def https_cache(cache: dict, url: str) -> str:
@@ -268,28 +302,55 @@ Additionally, these optional params are supported:
     else:
       raise Exception("'token' or 'pat' needed to be provided in the query params or env vars.")
 
+  def _create_channel(self, channel_module: Any = grpc) -> grpc.Channel:
+    """Create a gRPC channel to the API endpoint base with GRPC_CHANNEL_OPTIONS.
+
+    Args:
+      channel_module: grpc for a regular channel, or grpc.aio for an asyncio channel.
+
+    Returns:
+      channel: The gRPC channel.
+    """
+    if base_https_cache[self._base]:
+      return channel_module.secure_channel(
+          self._base, grpc.ssl_channel_credentials(), options=GRPC_CHANNEL_OPTIONS)
+    if self._base.find(":") >= 0:
+      host, port = self._base.split(":")
+    else:
+      host = self._base
+      port = 80
+    return channel_module.insecure_channel(f"{host}:{port}", options=GRPC_CHANNEL_OPTIONS)
+
   def get_stub(self) -> service_pb2_grpc.V2Stub:
     """Get the API gRPC stub using the right channel based on the API endpoint base.
 
+    Stubs are cached per base, so the underlying channel is shared by all clients of that base.
+
     Returns:
       stub: The service_pb2_grpc.V2Stub stub for the API.
     """
     if self._base not in base_https_cache:
       raise Exception("Cannot determine if base %s is https" % self._base)
 
-    https = base_https_cache[self._base]
-    if https:
-      channel = ClarifaiChannel.get_grpc_channel(base=self._base)
-    else:
-      if self._base.find(":") >= 0:
-        host, port = self._base.split(":")
-      else:
-        host = self._base
-        port = 80
-      channel = ClarifaiChannel.get_insecure_grpc_channel(base=host, port=port)
-    stub = service_pb2_grpc.V2Stub(channel)
+    with _base_stub_cache_lock:
+      stub = base_stub_cache.get(self._base)
+      if stub is None:
+        stub = v2_stub_for_channel(self._create_channel())
+        base_stub_cache[self._base] = stub
     return stub
 
+  def get_async_channel(self) -> grpc.aio.Channel:
+    """Get a grpc.aio channel to the API endpoint base, for use from asyncio code.
+
+    The channel is bound to the running event loop, so unlike get_stub() it is not cached and
+    the caller is responsible for closing it. Use it with create_async_stub() to get a stub that
+    handles authorization and retries.
+
+    Returns:
+      channel: The grpc.aio channel.
+    """
+    return self._create_channel(grpc.aio)
+
   @property
   def ui(self) -> str:
     """ Return the domain for the UI. """
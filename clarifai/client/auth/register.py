@@ -18,6 +18,9 @@ def _register_classes():
   for name in dir(grpc):
     if name.endswith('Callable'):
       RpcCallable.register(getattr(grpc, name))
+  for name in dir(grpc.aio):
+    if name.endswith('Callable'):
+      RpcCallable.register(getattr(grpc.aio, name))
 
 
 _register_classes()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from concurrent.futures import ThreadPoolExecutor
@@ -5,7 +6,7 @@ from concurrent.futures import ThreadPoolExecutor
 import grpc
 from clarifai_grpc.grpc.api.status import status_code_pb2
 
-from clarifai.client.auth.helper import ClarifaiAuthHelper
+from clarifai.client.auth.helper import ClarifaiAuthHelper, v2_stub_for_channel
 from clarifai.client.auth.register import RpcCallable, V2Stub
 
 throttle_status_codes = {
@@ -35,13 +36,31 @@ def create_stub(auth_helper: ClarifaiAuthHelper = None, max_retry_attempts: int
   return stub
 
 
+def create_async_stub(channel: grpc.aio.Channel,
+                      auth_helper: ClarifaiAuthHelper = None,
+                      max_retry_attempts: int = 10) -> V2Stub:
+  """
+  Create client stub on a grpc.aio channel that handles authorization and basic
+  retries for unavailable or throttled connections, like create_stub().
+
+  Args:
+    channel:  grpc.aio channel to the API, e.g. from ClarifaiAuthHelper.get_async_channel()
+    auth_helper:  ClarifaiAuthHelper to use for auth metadata (default: from env)
+    max_retry_attempts:  max attempts to retry rpcs with retryable failures
+  """
+  stub = AuthorizedStub(auth_helper, v2_stub_for_channel(channel))
+  if max_retry_attempts > 0:
+    return AsyncRetryStub(stub, max_retry_attempts)
+  return stub
+
+
 class AuthorizedStub(V2Stub):
   """V2Stub proxy that inserts metadata authorization in rpc calls."""
 
-  def __init__(self, auth_helper: ClarifaiAuthHelper = None):
+  def __init__(self, auth_helper: ClarifaiAuthHelper = None, stub: V2Stub = None):
     if auth_helper is None:
       auth_helper = ClarifaiAuthHelper.from_env()
-    self.stub = auth_helper.get_stub()
+    self.stub = stub if stub is not None else auth_helper.get_stub()
     self.metadata = auth_helper.metadata
 
   def __getattr__(self, name):
@@ -90,6 +109,22 @@ class RetryStub(V2Stub):
     return value
 
 
+def _should_retry_response(response, attempt, max_attempts):
+  """Whether to retry an rpc whose attempt number `attempt` returned `response`"""
+  if (response.status.code in throttle_status_codes) and attempt < max_attempts:
+    logging.debug('Retrying with status %s' % str(response.status))
+    return True
+  return False
+
+
+def _should_retry_error(error, attempt, max_attempts):
+  """Whether to retry an rpc whose attempt number `attempt` raised `error`"""
+  if (error.code() in retry_codes_grpc) and attempt < max_attempts:
+    logging.debug('Retrying with status %s' % error.code())
+    return True
+  return False
+
+
 class _RetryRpcCallable(RpcCallable):
   """Retries rpc calls on unavailable server or throttle codes"""
 
@@ -109,15 +144,12 @@ class _RetryRpcCallable(RpcCallable):
         time.sleep(self.backoff_time)  # TODO better backoff between attempts
       try:
         response = self.f(*args, **kwargs)
-        if (response.status.code in throttle_status_codes) and attempt < self.max_attempts:
-          logging.debug('Retrying with status %s' % str(response.status))
-        else:
-          return response
       except grpc.RpcError as e:
-        if (e.code() in retry_codes_grpc) and attempt < self.max_attempts:
-          logging.debug('Retrying with status %s' % e.code())
-        else:
+        if not _should_retry_error(e, attempt, self.max_attempts):
           raise
+      else:
+        if not _should_retry_response(response, attempt, self.max_attempts):
+          return response
 
   def future(self, *args, **kwargs):
     # TODO use single result event loop thread with asyncio
@@ -125,3 +157,45 @@ class _RetryRpcCallable(RpcCallable):
 
   def __getattr__(self, name):
     return getattr(self.f, name)
+
+
+class AsyncRetryStub(RetryStub):
+  """
+  RetryStub for stubs on grpc.aio channels, whose rpcs are awaited
+  """
+
+  def __getattr__(self, name):
+    value = getattr(self.stub, name)
+    if isinstance(value, RpcCallable):
+      value = _AsyncRetryRpcCallable(value, self.max_attempts, self.backoff_time)
+    return value
+
+
+class _AsyncRetryRpcCallable(RpcCallable):
+  """Retries awaited rpc calls on unavailable server or throttle codes"""
+
+  def __init__(self, func, max_attempts, backoff_time):
+    self.f = func
+    self.max_attempts = max_attempts
+    self.backoff_time = backoff_time
+
+  def __repr__(self):
+    return repr(self.f)
+
+  async def __call__(self, *args, **kwargs):
+    attempt = 0
+    while attempt < self.max_attempts:
+      attempt += 1
+      if attempt != 1:
+        await asyncio.sleep(self.backoff_time)
+      try:
+        response = await self.f(*args, **kwargs)
+      except grpc.RpcError as e:
+        if not _should_retry_error(e, attempt, self.max_attempts):
+          raise
+      else:
+        if not _should_retry_response(response, attempt, self.max_attempts):
+          return response
+
+  def __getattr__(self, name):
+    return getattr(self.f, name)
@@ -30,6 +30,8 @@ class BaseClient:
       base (str): The base URL for the API endpoint.
   """
 
+  __slots__ = ('auth_helper', 'STUB', 'metadata', 'user_app_id', 'base')
+
   def __init__(self, **kwargs):
     pat = os.environ.get('CLARIFAI_PAT', "")
     if pat == "":
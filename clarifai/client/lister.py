@@ -9,6 +9,8 @@ from clarifai.client.base import BaseClient
 class Lister(BaseClient):
   """Lister class for obtaining paginated results from the Clarifai API."""
 
+  __slots__ = ('default_page_size',)
+
   def __init__(self, page_size: int = 16):
     self.default_page_size = page_size
 
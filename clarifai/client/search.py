@@ -1,21 +1,58 @@
-from typing import Any, Callable, Dict, Generator
+import asyncio
+import functools
+from collections import deque
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Tuple
 
 from clarifai_grpc.grpc.api import resources_pb2, service_pb2
 from clarifai_grpc.grpc.api.status import status_code_pb2
-from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message
 from google.protobuf.struct_pb2 import Struct
-from schema import SchemaError
 
+from clarifai.client.auth.register import V2Stub
+from clarifai.client.auth.stub import create_async_stub
 from clarifai.client.base import BaseClient
-from clarifai.client.input import Inputs
 from clarifai.client.lister import Lister
-from clarifai.constants.search import DEFAULT_SEARCH_METRIC, DEFAULT_TOP_K
+from clarifai.constants.search import DEFAULT_SEARCH_METRIC, DEFAULT_SEARCH_PREFETCH, DEFAULT_TOP_K
 from clarifai.errors import UserError
-from clarifai.schema.search import get_schema
+from clarifai.schema.search import validate_rank_filter
+
+# Annotation for an empty rank or filter, i.e. the default `[{}]`.
+_EMPTY_ANNOT = resources_pb2.Annotation()
+
+
+def _freeze(value: Any) -> Any:
+  """Recursively convert rank or filter args into a hashable form that `_thaw` reverses."""
+  if isinstance(value, dict):
+    # Keep the key order: when an item sets the same field twice (e.g. image_url and
+    # image_bytes), the last key wins in `_get_annot_proto`.
+    return (dict, tuple((key, _freeze(val)) for key, val in value.items()))
+  if isinstance(value, (list, tuple)):
+    return (list, tuple(_freeze(val) for val in value))
+  if isinstance(value, Message):
+    # Protos (e.g. a Struct inside metadata) are unhashable, so key them by their canonical bytes.
+    return (type(value), value.SerializeToString(deterministic=True))
+  # Tag scalars with their type so that e.g. True and 1 do not share a cache entry.
+  return (type(value), value)
+
+
+def _thaw(frozen: Any) -> Any:
+  """Rebuild the rank or filter args frozen by `_freeze`."""
+  kind, value = frozen
+  if kind is dict:
+    return {key: _thaw(val) for key, val in value}
+  if kind is list:
+    return [_thaw(val) for val in value]
+  if issubclass(kind, Message):
+    return kind.FromString(value)
+  return value
 
 
 class Search(Lister, BaseClient):
 
+  __slots__ = ('user_id', 'app_id', 'metric_distance', '_async_channel', '_async_stub',
+               '_async_stub_loop', '__weakref__')
+  _METRIC_MAP = {"cosine": "COSINE_DISTANCE", "euclidean": "EUCLIDEAN_DISTANCE"}
+
   def __init__(self,
                user_id,
                app_id,
@@ -32,20 +69,52 @@ class Search(Lister, BaseClient):
         Raises:
             UserError: If the metric is not 'cosine' or 'euclidean'.
         """
-    if metric not in ["cosine", "euclidean"]:
+    try:
+      self.metric_distance = self._METRIC_MAP[metric]
+    except KeyError:
       raise UserError("Metric should be either cosine or euclidean")
 
     self.user_id = user_id
     self.app_id = app_id
-    self.metric_distance = dict(cosine="COSINE_DISTANCE", euclidean="EUCLIDEAN_DISTANCE")[metric]
-    self.data_proto = resources_pb2.Data()
+    self._async_channel = None
+    self._async_stub = None
+    self._async_stub_loop = None
 
-    self.inputs = Inputs(user_id=self.user_id, app_id=self.app_id)
-    self.rank_filter_schema = get_schema()
     BaseClient.__init__(self, user_id=self.user_id, app_id=self.app_id)
     Lister.__init__(self, page_size=top_k)
 
-  def _get_annot_proto(self, **kwargs):
+  @property
+  def async_stub(self) -> V2Stub:
+    """The gRPC stub on a `grpc.aio` channel, created lazily for the running event loop.
+
+        Like `STUB`, it adds the auth metadata to calls and retries unavailable or throttled
+        ones.
+
+        A `grpc.aio` channel only works on the loop it was created on. Await `aclose` to close
+        the channel once done with the async API, before using this from another event loop.
+
+        Raises:
+            UserError: If the channel is still open on another event loop.
+        """
+    loop = asyncio.get_running_loop()
+    if self._async_stub is None or self._async_stub_loop is not loop:
+      if self._async_channel is not None and not self._async_stub_loop.is_closed():
+        raise UserError("The async channel of this Search is open on another event loop, "
+                        "await aclose() on that loop before using it from a new one.")
+      self._async_channel = self.auth_helper.get_async_channel()
+      self._async_stub = create_async_stub(self._async_channel, self.auth_helper)
+      self._async_stub_loop = loop
+    return self._async_stub
+
+  async def aclose(self) -> None:
+    """Close the `grpc.aio` channel opened by `async_stub`, if any."""
+    channel = self._async_channel
+    self._async_channel = self._async_stub = self._async_stub_loop = None
+    if channel is not None:
+      await channel.close()
+
+  @staticmethod
+  def _get_annot_proto(**kwargs):
     """Get an Annotation proto message based on keyword arguments.
 
         Args:
@@ -57,41 +126,72 @@ class Search(Lister, BaseClient):
     if not kwargs:
       return resources_pb2.Annotation()
 
-    self.data_proto = resources_pb2.Data()
+    image = text = metadata = geo = None
+    concepts = []
     for key, value in kwargs.items():
       if key == "image_bytes":
-        image_proto = self.inputs.get_input_from_bytes("", image_bytes=value).data.image
-        self.data_proto.image.CopyFrom(image_proto)
+        image = resources_pb2.Image(base64=value)
 
       elif key == "image_url":
-        image_proto = self.inputs.get_input_from_url("", image_url=value).data.image
-        self.data_proto.image.CopyFrom(image_proto)
+        image = resources_pb2.Image(url=value)
 
       elif key == "concepts":
-        for concept in value:
-          concept_proto = resources_pb2.Concept(**concept)
-          self.data_proto.concepts.add().CopyFrom(concept_proto)
+        concepts = value
 
       elif key == "text_raw":
-        text_proto = self.inputs.get_input_from_bytes(
-            "", text_bytes=bytes(value, 'utf-8')).data.text
-        self.data_proto.text.CopyFrom(text_proto)
+        text = resources_pb2.Text(raw=value)
 
       elif key == "metadata":
-        metadata_struct = Struct()
-        metadata_struct.update(value)
-        self.data_proto.metadata.CopyFrom(metadata_struct)
+        metadata = Struct()
+        metadata.update(value)
 
       elif key == "geo_point":
-        geo_point_proto = self._get_geo_point_proto(value["longitude"], value["latitude"],
-                                                    value["geo_limit"])
-        self.data_proto.geo.CopyFrom(geo_point_proto)
+        geo = Search._get_geo_point_proto(value["longitude"], value["latitude"],
+                                          value["geo_limit"])
 
       else:
         raise UserError(f"kwargs contain key that is not supported: {key}")
-    return resources_pb2.Annotation(data=self.data_proto)
+    data = resources_pb2.Data(image=image, text=text, metadata=metadata, geo=geo)
+    for concept in concepts:
+      data.concepts.add(**concept)
+    return resources_pb2.Annotation(data=data)
+
+  @staticmethod
+  @functools.lru_cache(maxsize=128)
+  def _build_annots(frozen_items: Tuple[Any, ...]) -> Tuple[resources_pb2.Annotation, ...]:
+    """Get the Annotation proto messages for rank or filter items frozen by `_freeze`.
 
-  def _get_geo_point_proto(self, longitude: float, latitude: float,
+        Results are cached process-wide, so repeating a query with the same ranks or filters
+        reuses them, also across Search instances. Items with `image_bytes` are not cached.
+
+        Args:
+            frozen_items (Tuple): The frozen rank or filter items.
+
+        Returns:
+            Tuple[resources_pb2.Annotation, ...]: An Annotation proto message per item.
+        """
+    return tuple(Search._get_annot_proto(**_thaw(item)) for item in frozen_items)
+
+  def _get_annots(self, items: List[Dict[str, Any]]) -> Tuple[resources_pb2.Annotation, ...]:
+    """Validate rank or filter items and get their Annotation proto messages.
+
+        Args:
+            items (List[Dict]): The rank or filter items.
+
+        Returns:
+            Tuple[resources_pb2.Annotation, ...]: An Annotation proto message per item.
+        """
+    if items == [{}]:
+      return (_EMPTY_ANNOT,)
+    validate_rank_filter(items)
+    # Image bytes can be megabytes each, so items with them skip the cache rather than keeping
+    # the bytes alive as cache keys and in the cached protos.
+    if any("image_bytes" in item for item in items):
+      return tuple(self._get_annot_proto(**item) for item in items)
+    return self._build_annots(tuple(_freeze(item) for item in items))
+
+  @staticmethod
+  def _get_geo_point_proto(longitude: float, latitude: float,
                            geo_limit: float) -> resources_pb2.Geo:
     """Get a GeoPoint proto message based on geographical data.
 
@@ -107,61 +207,138 @@ class Search(Lister, BaseClient):
         geo_point=resources_pb2.GeoPoint(longitude=longitude, latitude=latitude),
         geo_limit=resources_pb2.GeoLimit(type="withinKilometers", value=geo_limit))
 
+  def _iter_page_requests(self, proto_message: Any,
+                          request_data: Dict[str, Any]) -> Generator[Any, None, None]:
+    """Yield the request for each page of a listing in turn, starting from the first page.
+
+        Args:
+            proto_message (Any): The proto message to use.
+            request_data (dict): The request data to use.
+
+        Yields:
+            The request proto message for the next page.
+        """
+    request_data['pagination'] = service_pb2.Pagination(page=1, per_page=self.default_page_size)
+    request = proto_message(**request_data)
+    page = 1
+    while True:
+      # Requests in flight are serialized concurrently, so each page gets its own copy.
+      page_request = proto_message()
+      page_request.CopyFrom(request)
+      page_request.pagination.page = page
+      yield page_request
+      page += 1
+
+  @staticmethod
+  def _count_hits(response: Any) -> int:
+    """Check a page of a listing, returning how many hits it has.
+
+        Args:
+            response (Any): The response for the page.
+
+        Returns:
+            int: The number of hits on the page. A page with fewer than `per_page` hits is the
+            last one.
+
+        Raises:
+            Exception: If the response status is not SUCCESS.
+        """
+    if response.status.code != status_code_pb2.SUCCESS:
+      raise Exception(f"Listing failed with response {response!r}")
+    return len(response.hits)
+
   def list_all_pages_generator(
       self, endpoint: Callable[..., Any], proto_message: Any,
       request_data: Dict[str, Any]) -> Generator[Dict[str, Any], None, None]:
     """Lists all pages of a resource.
 
+        The first page is requested on its own, and the listing ends at the first page with
+        fewer than `per_page` hits. Once the consumer asks for the page after a full one, up to
+        `DEFAULT_SEARCH_PREFETCH` pages are requested concurrently through `endpoint.future`,
+        while pages are still yielded in order.
+
         Args:
-            endpoint (Callable): The endpoint to call.
+            endpoint (Callable): The stub endpoint to call.
             proto_message (Any): The proto message to use.
             request_data (dict): The request data to use.
 
         Yields:
             response_dict: The next item in the listing.
         """
-    page = 1
-    request_data['pagination'] = service_pb2.Pagination(page=page, per_page=self.default_page_size)
-    while True:
-      request_data['pagination'].page = page
-      response = self._grpc_request(endpoint, proto_message(**request_data))
-      dict_response = MessageToDict(response, preserving_proto_field_name=True)
-      if response.status.code != status_code_pb2.SUCCESS:
-        raise Exception(f"Listing failed with response {response!r}")
-
-      if 'hits' not in list(dict_response.keys()):
-        break
-      page += 1
-      yield response
+    page_requests = self._iter_page_requests(proto_message, request_data)
+    pending = deque([endpoint.future(next(page_requests))])
+    try:
+      while True:
+        response = pending.popleft().result()
+        num_hits = self._count_hits(response)
+        if num_hits > 0:
+          yield response
+        if num_hits < self.default_page_size:
+          break
+        # Only a full page can be followed by more, so prefetch from here on.
+        while len(pending) < DEFAULT_SEARCH_PREFETCH:
+          pending.append(endpoint.future(next(page_requests)))
+    finally:
+      for future in pending:
+        future.cancel()
+
+  async def list_all_pages_generator_async(
+      self, endpoint: Callable[..., Any], proto_message: Any,
+      request_data: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+    """Lists all pages of a resource from asyncio code.
 
-  def query(self, ranks=[{}], filters=[{}]):
-    """Perform a query with rank and filters.
+        Same as `list_all_pages_generator`, but `endpoint` is a method of `async_stub` and the
+        prefetched calls run as tasks on the event loop instead of threads.
+
+        Args:
+            endpoint (Callable): The `async_stub` endpoint to call.
+            proto_message (Any): The proto message to use.
+            request_data (dict): The request data to use.
+
+        Yields:
+            response_dict: The next item in the listing.
+        """
+    page_requests = self._iter_page_requests(proto_message, request_data)
+    pending = deque([asyncio.ensure_future(endpoint(next(page_requests)))])
+    try:
+      while True:
+        response = await pending.popleft()
+        num_hits = self._count_hits(response)
+        if num_hits > 0:
+          yield response
+        if num_hits < self.default_page_size:
+          break
+        while len(pending) < DEFAULT_SEARCH_PREFETCH:
+          pending.append(asyncio.ensure_future(endpoint(next(page_requests))))
+    finally:
+      for task in pending:
+        task.cancel()
+
+  def _get_request_data(self,
+                        ranks: List[Dict[str, Any]] = None,
+                        filters: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Validate ranks and filters and get the PostAnnotationsSearchesRequest data for them.
 
         Args:
             ranks (List[Dict], optional): List of rank parameters. Defaults to [{}].
             filters (List[Dict], optional): List of filter parameters. Defaults to [{}].
 
         Returns:
-            Generator[Dict[str, Any], None, None]: A generator of query results.
+            dict: The request data to use.
         """
-    try:
-      self.rank_filter_schema.validate(ranks)
-      self.rank_filter_schema.validate(filters)
-    except SchemaError as err:
-      raise UserError(f"Invalid rank or filter input: {err}")
-
-    rank_annot_proto, filters_annot_proto = [], []
-    for rank_dict in ranks:
-      rank_annot_proto.append(self._get_annot_proto(**rank_dict))
-    for filter_dict in filters:
-      filters_annot_proto.append(self._get_annot_proto(**filter_dict))
+    if ranks is None:
+      ranks = [{}]
+    if filters is None:
+      filters = [{}]
+    rank_annot_proto = self._get_annots(ranks)
+    filters_annot_proto = self._get_annots(filters)
 
     all_ranks = [resources_pb2.Rank(annotation=rank_annot) for rank_annot in rank_annot_proto]
     all_filters = [
         resources_pb2.Filter(annotation=filter_annot) for filter_annot in filters_annot_proto
     ]
 
-    request_data = dict(
+    return dict(
         user_app_id=self.user_app_id,
         searches=[
             resources_pb2.Search(
@@ -169,5 +346,35 @@ class Search(Lister, BaseClient):
                 metric=self.metric_distance)
         ])
 
+  def query(self, ranks=None, filters=None):
+    """Perform a query with rank and filters.
+
+        Args:
+            ranks (List[Dict], optional): List of rank parameters. Defaults to [{}].
+            filters (List[Dict], optional): List of filter parameters. Defaults to [{}].
+
+        Returns:
+            Generator[Dict[str, Any], None, None]: A generator of query results.
+        """
+    request_data = self._get_request_data(ranks, filters)
     return self.list_all_pages_generator(self.STUB.PostAnnotationsSearches,
                                          service_pb2.PostAnnotationsSearchesRequest, request_data)
+
+  def query_async(self, ranks=None, filters=None):
+    """Perform a query with rank and filters from asyncio code.
+
+        Args:
+            ranks (List[Dict], optional): List of rank parameters. Defaults to [{}].
+            filters (List[Dict], optional): List of filter parameters. Defaults to [{}].
+
+        Returns:
+            AsyncGenerator[Dict[str, Any], None]: An async generator of query results.
+
+        Example:
+            >>> async for page in search.query_async(ranks=[{"text_raw": "dog"}]):
+            ...   print(page.hits)
+        """
+    request_data = self._get_request_data(ranks, filters)
+    return self.list_all_pages_generator_async(self.async_stub.PostAnnotationsSearches,
+                                               service_pb2.PostAnnotationsSearchesRequest,
+                                               request_data)
@@ -1,2 +1,4 @@
 DEFAULT_TOP_K = 10
 DEFAULT_SEARCH_METRIC = "cosine"
+# Number of result pages requested ahead of the consumer while paginating a search.
+DEFAULT_SEARCH_PREFETCH = 4
@@ -1,6 +1,19 @@
+import functools
+import re
+from typing import Any, Dict, List
+
 from schema import And, Optional, Regex, Schema
 
+from clarifai.errors import UserError
+
+_URL_RE = re.compile(r'^https?://')
+# Non-empty strings with internal dashes and underscores.
+_NAME_RE = re.compile(r'^[0-9A-Za-z]+([-_][0-9A-Za-z]+)*$')
+
+_GEO_POINT_TYPES = {'longitude': float, 'latitude': float, 'geo_limit': int}
 
+
+@functools.lru_cache(maxsize=1)
 def get_schema() -> Schema:
   """Initialize the schema for rank and filter.
 
@@ -21,6 +34,8 @@ def get_schema() -> Schema:
             - 'language': Non-empty string
             - 'value': 0 or 1 integer
 
+        The schema is built once and cached, so repeated calls return the same object.
+
         Returns:
             Schema: The schema for rank and filter.
         """
@@ -32,15 +47,14 @@ def get_schema() -> Schema:
           And(str, len),
       Optional('language'):
           And(str, len),
-      # Non-empty strings with internal dashes and underscores.
       Optional('name'):
-          And(str, len, Regex(r'^[0-9A-Za-z]+([-_][0-9A-Za-z]+)*$'))
+          And(str, len, Regex(_NAME_RE.pattern))
   })
 
   # Schema for a rank or filter item
   rank_filter_item_schema = Schema({
       Optional('image_url'):
-          And(str, Regex(r'^https?://')),
+          And(str, Regex(_URL_RE.pattern)),
       Optional('text_raw'):
           And(str, len),
       Optional('metadata'):
@@ -58,3 +72,77 @@ def get_schema() -> Schema:
 
   # Schema for rank and filter args
   return Schema([rank_filter_item_schema])
+
+
+def _is_non_empty_str(value: Any) -> bool:
+  return isinstance(value, str) and len(value) > 0
+
+
+def _is_type(value: Any, type_: type) -> bool:
+  # Like `schema`, do not accept bools where ints are expected.
+  return isinstance(value, type_) and not (type_ is int and isinstance(value, bool))
+
+
+_CONCEPT_KEYS = frozenset(('value', 'id', 'language', 'name'))
+
+
+def _validate_concepts(concepts: Any) -> None:
+  if not isinstance(concepts, list):
+    raise UserError(f"Invalid rank or filter input: 'concepts' should be a list: {concepts!r}")
+  for concept in concepts:
+    if not isinstance(concept, dict) or not concept:
+      raise UserError(
+          f"Invalid rank or filter input: concept must be a non-empty dict: {concept!r}")
+    if not concept.keys() <= _CONCEPT_KEYS:
+      key = next(key for key in concept if key not in _CONCEPT_KEYS)
+      raise UserError(f"Invalid rank or filter input: unsupported concept key {key!r}")
+    value = concept.get('value', 0)
+    if not _is_type(value, int) or value not in (0, 1):
+      raise UserError(f"Invalid rank or filter input: invalid concept 'value': {value!r}")
+    for key in ('id', 'language', 'name'):
+      if key in concept and not _is_non_empty_str(concept[key]):
+        raise UserError(f"Invalid rank or filter input: invalid concept {key!r}: {concept[key]!r}")
+    if 'name' in concept and _NAME_RE.match(concept['name']) is None:
+      raise UserError(f"Invalid rank or filter input: invalid concept 'name': {concept['name']!r}")
+
+
+def _validate_rank_filter_item(item: Any) -> None:
+  if not isinstance(item, dict):
+    raise UserError(f"Invalid rank or filter input: {item!r} should be a dict")
+  for key, value in item.items():
+    if key == 'image_url':
+      valid = isinstance(value, str) and _URL_RE.match(value) is not None
+    elif key == 'text_raw':
+      valid = _is_non_empty_str(value)
+    elif key == 'metadata':
+      valid = isinstance(value, dict)
+    elif key == 'image_bytes':
+      valid = isinstance(value, bytes)
+    elif key == 'geo_point':
+      valid = (isinstance(value, dict) and value.keys() == _GEO_POINT_TYPES.keys() and
+               all(_is_type(value[k], t) for k, t in _GEO_POINT_TYPES.items()))
+    elif key == 'concepts':
+      _validate_concepts(value)
+      continue
+    else:
+      raise UserError(f"Invalid rank or filter input: unsupported key {key!r}")
+    if not valid:
+      raise UserError(f"Invalid rank or filter input: invalid {key!r}: {value!r}")
+
+
+def validate_rank_filter(items: List[Dict[str, Any]]) -> None:
+  """Validate rank or filter args against the rules described in `get_schema`.
+
+        This is a hand-written equivalent of `get_schema().validate(items)` that avoids
+        the per-key dispatch of the `schema` library on every query.
+
+        Args:
+            items (List[Dict]): The rank or filter items to validate.
+
+        Raises:
+            UserError: If the items do not match the schema.
+        """
+  if not isinstance(items, list):
+    raise UserError(f"Invalid rank or filter input: {items!r} should be a list")
+  for item in items:
+    _validate_rank_filter_item(item)
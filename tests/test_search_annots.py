@@ -0,0 +1,55 @@
+import gc
+import weakref
+
+import pytest
+
+from clarifai.client.search import Search, _freeze, _thaw
+
+
+@pytest.fixture(autouse=True)
+def fake_pat(monkeypatch):
+  monkeypatch.setenv("CLARIFAI_PAT", "fake_pat")
+  Search._build_annots.cache_clear()
+
+
+def build_annots(search, items):
+  return search._build_annots(tuple(_freeze(item) for item in items))
+
+
+def test_freeze_round_trip():
+  item = {"metadata": {"a": 1, "b": [True, {"c": None}]}, "concepts": [{"name": "dog"}]}
+  assert _thaw(_freeze(item)) == item
+  assert _freeze({"metadata": {"a": 1}}) != _freeze({"metadata": {"a": True}})
+
+
+def test_annots_cached_across_instances():
+  filters = [{"concepts": [{"name": "dog", "value": 1}]}]
+  first = build_annots(Search(user_id="user", app_id="app"), filters)
+  second = build_annots(Search(user_id="user", app_id="app"), filters)
+  assert second is first
+  assert Search._build_annots.cache_info().hits == 1
+
+
+def test_annots_cache_does_not_keep_search_alive():
+  search = Search(user_id="user", app_id="app")
+  build_annots(search, [{"text_raw": "dog"}])
+  ref = weakref.ref(search)
+  del search
+  gc.collect()
+  assert ref() is None
+
+
+def test_annots_cache_does_not_keep_image_bytes():
+  search = Search(user_id="user", app_id="app")
+  ranks = [{"image_bytes": b"\xff" * 1024}, {"text_raw": "dog"}]
+  annots = search._get_annots(ranks)
+  assert annots[0].data.image.base64 == ranks[0]["image_bytes"]
+  assert Search._build_annots.cache_info().currsize == 0
+
+
+def test_last_image_key_wins():
+  url_last = [{"image_bytes": b"zz", "image_url": "https://a"}]
+  bytes_last = [{"image_url": "https://a", "image_bytes": b"zz"}]
+  search = Search(user_id="user", app_id="app")
+  assert build_annots(search, url_last)[0].data.image.url == "https://a"
+  assert build_annots(search, bytes_last)[0].data.image.base64 == b"zz"
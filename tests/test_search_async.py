@@ -0,0 +1,99 @@
+import asyncio
+
+import grpc
+import pytest
+from clarifai_grpc.grpc.api import service_pb2, service_pb2_grpc
+from clarifai_grpc.grpc.api.status import status_code_pb2
+
+from clarifai.client.search import Search
+from clarifai.errors import UserError
+
+
+class MockSearchServicer(service_pb2_grpc.V2Servicer):
+  """Serves `num_pages` pages, the last one short, throttling the first request for page 1."""
+
+  def __init__(self, num_pages):
+    self.num_pages = num_pages
+    self.pages = []
+    self.metadata = []
+
+  async def PostAnnotationsSearches(self, request, context):
+    page = request.pagination.page
+    self.pages.append(page)
+    self.metadata.append(dict(context.invocation_metadata()))
+    response = service_pb2.MultiSearchResponse()
+    response.status.code = status_code_pb2.SUCCESS
+    if self.pages.count(1) == 1 and page == 1:
+      response.status.code = status_code_pb2.CONN_THROTTLED
+    elif page <= self.num_pages:
+      # Full pages until the last one, which is short.
+      num_hits = request.pagination.per_page if page < self.num_pages else 1
+      for _ in range(num_hits):
+        hit = response.hits.add()
+        hit.input.id = f"page-{page}"
+        hit.input.data.CopyFrom(request.searches[0].query.ranks[0].annotation.data)
+    return response
+
+
+@pytest.fixture(autouse=True)
+def fake_pat(monkeypatch):
+  monkeypatch.setenv("CLARIFAI_PAT", "fake_pat")
+
+
+async def query_server(num_pages):
+  servicer = MockSearchServicer(num_pages)
+  server = grpc.aio.server()
+  service_pb2_grpc.add_V2Servicer_to_server(servicer, server)
+  port = server.add_insecure_port("localhost:0")
+  await server.start()
+  search = Search(user_id="user", app_id="app", top_k=2)
+  search.auth_helper.set_base(f"http://localhost:{port}")
+  search.async_stub.backoff_time = 0
+  try:
+    pages = [page async for page in search.query_async(ranks=[{"text_raw": "dog"}])]
+  finally:
+    await search.aclose()
+    await server.stop(None)
+  return servicer, pages
+
+
+def test_query_async():
+  servicer, pages = asyncio.run(query_server(num_pages=5))
+  assert [page.hits[0].input.id for page in pages] == [f"page-{page}" for page in range(1, 6)]
+  assert all(page.hits[0].input.data.text.raw == "dog" for page in pages)
+  # The throttled first call is retried.
+  assert servicer.pages.count(1) == 2
+  assert all(metadata["authorization"] == "Key fake_pat" for metadata in servicer.metadata)
+
+
+def test_aclose():
+
+  async def run():
+    search = Search(user_id="user", app_id="app")
+    search.auth_helper.set_base("http://localhost:1")
+    assert search.async_stub is search.async_stub
+    channel = search._async_channel
+    await search.aclose()
+    assert search._async_channel is None
+    with pytest.raises(grpc.aio.UsageError):
+      await channel.unary_unary("/test")(b"")
+
+  asyncio.run(run())
+
+
+def test_async_stub_requires_aclose_before_new_loop():
+
+  async def get_stub(search):
+    return search.async_stub
+
+  search = Search(user_id="user", app_id="app")
+  search.auth_helper.set_base("http://localhost:1")
+  loop = asyncio.new_event_loop()
+  try:
+    stub = loop.run_until_complete(get_stub(search))
+    with pytest.raises(UserError, match="aclose"):
+      asyncio.run(get_stub(search))
+    loop.run_until_complete(search.aclose())
+  finally:
+    loop.close()
+  assert asyncio.run(get_stub(search)) is not stub
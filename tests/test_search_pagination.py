@@ -0,0 +1,94 @@
+from concurrent.futures import Future
+
+import pytest
+from clarifai_grpc.grpc.api import service_pb2
+from clarifai_grpc.grpc.api.status import status_code_pb2
+
+from clarifai.client.search import Search
+from clarifai.constants.search import DEFAULT_SEARCH_PREFETCH
+
+
+class MockEndpoint:
+  """Stub endpoint whose futures return `num_hits` hits split into pages of `per_page`."""
+
+  def __init__(self, num_hits, failing_page=None, resolved_pages=None):
+    self.num_hits = num_hits
+    self.failing_page = failing_page
+    self.resolved_pages = resolved_pages
+    self.futures = {}
+
+  def response(self, request):
+    page, per_page = request.pagination.page, request.pagination.per_page
+    response = service_pb2.MultiSearchResponse()
+    response.status.code = status_code_pb2.SUCCESS
+    if page == self.failing_page:
+      response.status.code = status_code_pb2.FAILURE
+      return response
+    for _ in range((page - 1) * per_page, min(page * per_page, self.num_hits)):
+      response.hits.add().input.id = f"page-{page}"
+    return response
+
+  def future(self, request):
+    page = request.pagination.page
+    future = Future()
+    if self.resolved_pages is None or page <= self.resolved_pages:
+      future.set_result(self.response(request))
+    self.futures[page] = future
+    return future
+
+
+@pytest.fixture
+def search(monkeypatch):
+  monkeypatch.setenv("CLARIFAI_PAT", "fake_pat")
+  return Search(user_id="user", app_id="app", top_k=2)
+
+
+def list_pages(search, endpoint):
+  return search.list_all_pages_generator(endpoint, service_pb2.PostAnnotationsSearchesRequest,
+                                         dict(user_app_id=search.user_app_id))
+
+
+def test_pages_in_order(search):
+  endpoint = MockEndpoint(num_hits=11)
+  pages = [response.hits[0].input.id for response in list_pages(search, endpoint)]
+  assert pages == [f"page-{page}" for page in range(1, 7)]
+  assert len(endpoint.futures[6].result().hits) == 1
+
+
+def test_no_hits_makes_one_request(search):
+  endpoint = MockEndpoint(num_hits=0)
+  assert list(list_pages(search, endpoint)) == []
+  assert list(endpoint.futures) == [1]
+
+
+def test_short_first_page_makes_one_request(search):
+  endpoint = MockEndpoint(num_hits=1)
+  assert len(list(list_pages(search, endpoint))) == 1
+  assert list(endpoint.futures) == [1]
+
+
+def test_prefetches_after_full_page(search):
+  endpoint = MockEndpoint(num_hits=4)
+  pages = list_pages(search, endpoint)
+  next(pages)
+  assert list(endpoint.futures) == [1]
+  next(pages)
+  assert sorted(endpoint.futures) == list(range(1, DEFAULT_SEARCH_PREFETCH + 2))
+
+
+def test_raises_on_error_status(search):
+  endpoint = MockEndpoint(num_hits=10, failing_page=2)
+  pages = list_pages(search, endpoint)
+  assert next(pages).hits[0].input.id == "page-1"
+  with pytest.raises(Exception, match="Listing failed"):
+    next(pages)
+
+
+def test_close_cancels_pending_requests(search):
+  endpoint = MockEndpoint(num_hits=20, resolved_pages=2)
+  pages = list_pages(search, endpoint)
+  assert next(pages).hits[0].input.id == "page-1"
+  assert next(pages).hits[0].input.id == "page-2"
+  pages.close()
+  assert not any(endpoint.futures[page].cancelled() for page in (1, 2))
+  assert all(endpoint.futures[page].cancelled() for page in endpoint.futures if page > 2)
@@ -0,0 +1,178 @@
+import pytest
+
+from clarifai.errors import UserError
+from clarifai.schema.search import get_schema, validate_rank_filter
+
+GEO_POINT = {"longitude": -29.0, "latitude": 40.0, "geo_limit": 10}
+
+VALID_INPUTS = [
+    [],
+    [{}],
+    [{
+        "image_url": "https://samples.clarifai.com/dog.tiff"
+    }],
+    [{
+        "image_bytes": b"\x89PNG"
+    }],
+    [{
+        "text_raw": "a dog"
+    }],
+    [{
+        "metadata": {
+            "a": 1,
+            "b": [True, None]
+        }
+    }],
+    [{
+        "geo_point": GEO_POINT
+    }],
+    [{
+        "concepts": []
+    }],
+    [{
+        "concepts": [{
+            "name": "dog",
+            "value": 1
+        }, {
+            "id": "deer",
+            "language": "en",
+            "value": 0
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "dog-cat_1"
+        }]
+    }, {
+        "text_raw": "t",
+        "image_url": "http://x"
+    }],
+]
+
+INVALID_INPUTS = [
+    {},
+    ({},),
+    ["dog"],
+    [{
+        "foo": 1
+    }],
+    [{
+        "image_url": "ftp://x"
+    }],
+    [{
+        "image_url": b"https://x"
+    }],
+    [{
+        "image_bytes": "abc"
+    }],
+    [{
+        "text_raw": ""
+    }],
+    [{
+        "metadata": []
+    }],
+    [{
+        "geo_point": dict(GEO_POINT, extra=1)
+    }],
+    [{
+        "geo_point": dict(GEO_POINT, longitude=-29)
+    }],
+    [{
+        "geo_point": dict(GEO_POINT, geo_limit=True)
+    }],
+    [{
+        "geo_point": {
+            "longitude": -29.0,
+            "latitude": 40.0
+        }
+    }],
+    [{
+        "concepts": {
+            "name": "dog"
+        }
+    }],
+    [{
+        "concepts": [{}]
+    }],
+    [{
+        "concepts": ["dog"]
+    }],
+    [{
+        "concepts": [{
+            "value": 1,
+            "concept_id": "deer"
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "deer",
+            "value": 2
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "dog",
+            "value": True
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "dog",
+            "value": 1.0
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "do g"
+        }]
+    }],
+    [{
+        "concepts": [{
+            "name": "-dog"
+        }]
+    }],
+    [{
+        "concepts": [{
+            "id": ""
+        }]
+    }],
+    [{
+        "concepts": [{
+            "language": None
+        }]
+    }],
+]
+
+
+@pytest.mark.parametrize("items", VALID_INPUTS)
+def test_validate_rank_filter_valid(items):
+  assert get_schema().is_valid(items)
+  validate_rank_filter(items)
+
+
+@pytest.mark.parametrize("items", INVALID_INPUTS)
+def test_validate_rank_filter_invalid(items):
+  assert not get_schema().is_valid(items)
+  with pytest.raises(UserError):
+    validate_rank_filter(items)
+
+
+@pytest.mark.parametrize("concept,message", [
+    ({
+        "value": 1,
+        "concept_id": "deer"
+    }, "unsupported concept key 'concept_id'"),
+    ({
+        "name": "deer",
+        "value": 2
+    }, "invalid concept 'value': 2"),
+    ({
+        "id": ""
+    }, "invalid concept 'id': ''"),
+    ({
+        "name": "do g"
+    }, "invalid concept 'name': 'do g'"),
+])
+def test_validate_rank_filter_concept_errors(concept, message):
+  with pytest.raises(UserError, match=message):
+    validate_rank_filter([{"concepts": [concept]}])
@@ -0,0 +1,25 @@
+import pytest
+
+from clarifai.client.base import BaseClient
+from clarifai.client.lister import Lister
+from clarifai.client.search import Search
+
+
+@pytest.fixture(autouse=True)
+def fake_pat(monkeypatch):
+  monkeypatch.setenv("CLARIFAI_PAT", "fake_pat")
+
+
+def test_slots_are_pinned():
+  # Adding an attribute to these classes needs a new slot here and a CHANGELOG entry.
+  assert BaseClient.__slots__ == ('auth_helper', 'STUB', 'metadata', 'user_app_id', 'base')
+  assert Lister.__slots__ == ('default_page_size',)
+  assert Search.__slots__ == ('user_id', 'app_id', 'metric_distance', '_async_channel',
+                              '_async_stub', '_async_stub_loop', '__weakref__')
+
+
+def test_search_has_no_dict():
+  search = Search(user_id="user", app_id="app")
+  assert not hasattr(search, "__dict__")
+  with pytest.raises(AttributeError):
+    search.foo = 1
@@ -1,12 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 
 import grpc
 import pytest as pytest
-from clarifai_grpc.grpc.api import service_pb2
+from clarifai_grpc.channel import clarifai_channel
+from clarifai_grpc.grpc.api import service_pb2, service_pb2_grpc
 from clarifai_grpc.grpc.api.status import status_code_pb2
 
 from clarifai.client.auth.helper import ClarifaiAuthHelper, clear_cache
-from clarifai.client.auth.stub import AuthorizedStub, RetryStub
+from clarifai.client.auth.stub import AuthorizedStub, RetryStub, create_async_stub
 
 
 class MockRpcError(grpc.RpcError):
@@ -18,6 +21,44 @@ def clear_caches():
   clear_cache()
 
 
+def test_stub_shared_per_base():
+  auth = ClarifaiAuthHelper("clarifai", "main", "fake_pat")
+  other_auth = ClarifaiAuthHelper("other_user", "other_app", "other_pat")
+  stub = auth.get_stub()
+  assert other_auth.get_stub() is stub
+  clear_cache()
+  auth = ClarifaiAuthHelper("clarifai", "main", "fake_pat")
+  assert auth.get_stub() is not stub
+
+
+class MockInputsServicer(service_pb2_grpc.V2Servicer):
+
+  def ListInputs(self, request, context):
+    response = service_pb2.MultiInputResponse()
+    response.status.code = status_code_pb2.SUCCESS
+    response.inputs.add().id = request.user_app_id.app_id
+    return response
+
+
+def test_stub_deserializes_responses():
+  server = grpc.server(ThreadPoolExecutor(1))
+  service_pb2_grpc.add_V2Servicer_to_server(MockInputsServicer(), server)
+  port = server.add_insecure_port("localhost:0")
+  server.start()
+  # Another client may have left the JSON channel's deserializers in place.
+  clarifai_channel.wrap_response_deserializer = clarifai_channel._response_deserializer_for_json
+  try:
+    auth = ClarifaiAuthHelper("clarifai", "main", "fake_pat", base=f"http://localhost:{port}")
+    req = service_pb2.ListInputsRequest()
+    req.user_app_id.app_id = 'test_stub_deserializes_responses'
+    response = auth.get_stub().ListInputs(req)
+  finally:
+    server.stop(None)
+  assert isinstance(response, service_pb2.MultiInputResponse)
+  assert response.status.code == status_code_pb2.SUCCESS
+  assert response.inputs[0].id == 'test_stub_deserializes_responses'
+
+
 def test_auth_unary_unary():
   auth = ClarifaiAuthHelper("clarifai", "main", "fake_pat")
   stub = AuthorizedStub(auth)
@@ -95,3 +136,39 @@ def test_retry_grpcconn_unary_unary():
         assert res is success_response
       else:
         assert res is error
+
+
+def test_retry_async_unary_unary():
+  max_attempts = 5
+  auth = ClarifaiAuthHelper("clarifai", "main", "fake_pat")
+  retry_response = service_pb2.MultiInputResponse()
+  retry_response.status.code = status_code_pb2.CONN_THROTTLED
+  success_response = service_pb2.MultiInputResponse()
+  success_response.status.code = status_code_pb2.SUCCESS
+  error = MockRpcError()
+  error.code = lambda: grpc.StatusCode.UNAVAILABLE
+
+  async def run():
+    channel = auth.get_async_channel()
+    stub = create_async_stub(channel, auth, max_retry_attempts=max_attempts)
+    stub.backoff_time = 0.0001
+    for nfailures in range(0, max_attempts + 1):
+      mock_resps = [retry_response, error] * nfailures
+      mock_resps = mock_resps[:nfailures] + [success_response]
+      mock_f = mock.AsyncMock(spec=stub.stub.stub.ListInputs, side_effect=mock_resps)
+      with mock.patch.object(stub.stub.stub, 'ListInputs', mock_f):
+        req = service_pb2.ListInputsRequest()
+        req.user_app_id.app_id = 'test_retry_async_unary_unary'
+        try:
+          res = await stub.ListInputs(req)
+        except Exception as e:
+          res = e
+        assert mock_f.call_count == min(max_attempts, len(mock_resps))
+        mock_f.assert_called_with(req, metadata=auth.metadata)
+        if nfailures < max_attempts:
+          assert res is success_response
+        else:
+          assert res is mock_resps[max_attempts - 1]
+    await channel.close()
+
+  asyncio.run(run())